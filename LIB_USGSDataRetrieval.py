@@ -13,15 +13,21 @@ Usage:
     - Ensure you have an active internet connection.
     - Customize the parameters as needed for your specific use case.
     - Run the script in a Python environment.
-    - downloadUSGS(siteNo,dtype,startDT,endDT,saveheaderparth=None,printHeader=True) is for USGS streamgage time series data retrieval
+    - downloadUSGS(siteNo,dtype,startDT,endDT,saveheaderparth=None,printHeader=True,outformat='rdb') is for USGS streamgage time series data retrieval
+    - clearUSGSDownloadCache() forgets the results downloadUSGS has memoized and empties the disk cache for every site
+    - pruneUSGSCache(maxAge=None) deletes raw responses in the disk cache older than USGS_CACHE_MAX_AGE seconds
+    - downloadUSGS_arrays(siteNo,dtype,startDT,endDT,paramCode='00060') returns plain numpy arrays for one parameter
+    - downloadUSGS_many(sites,dtype,startDT,endDT,saveheaderparth=None,max_workers=8) downloads several streamgages concurrently
     - downloadUSGSWQ(siteNo,dtype,paramgroup,saveheaderparth=None,printHeader=True) is for USGS water quality data retrieval
     - Use df.to_csv(fname) to save the datafile
     - Use readDownloadedData(fname) to read the downloaded data file
     
 Dependencies:
-    - urllib.request
+    - urllib.parse
+    - requests
     - pandas
     - numpy
+    - pyarrow (optional, faster parsing of large downloads)
 
 Example:
     - python usgs_streamgage_retrieval.py
@@ -34,11 +40,65 @@ References:
 
 import numpy as np
 import pandas as pd
-import urllib.request
+import io
+import json
+import hashlib
+import re
+import tempfile
+import time
+import threading
 import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import sys,os
 
+# pyarrow is optional: when installed, RDB tables are tokenized with its
+# multithreaded CSV reader instead of the single-threaded pandas C parser.
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+    pacsv = None
+
+# Shared HTTP session so repeated downloads reuse pooled keep-alive
+# connections instead of paying a new TCP+TLS handshake on every call.
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                                       max_retries=Retry(total=3, backoff_factor=0.3)))
+
+# Raw responses are cached on disk keyed by URL. A cached copy younger than
+# USGS_CACHE_EXPIRE seconds is reused as-is; older copies are revalidated with
+# a conditional GET (If-None-Match / If-Modified-Since). Set USGS_CACHE_DIR to
+# None to always download. Entries are never removed automatically; call
+# pruneUSGSCache() to delete ones older than USGS_CACHE_MAX_AGE seconds.
+USGS_CACHE_DIR = os.path.join(os.path.expanduser('~'),'.cache','usgs')
+USGS_CACHE_EXPIRE = 3600
+USGS_CACHE_MAX_AGE = 7*24*3600
+# Files the cache owns: <sha1 of URL>.body / .json pairs and in-flight temp files.
+_CACHE_ENTRY = re.compile(r'^([0-9a-f]{40})\.(body|json)$')
+_CACHE_TMP_PREFIX = 'usgs-tmp-'
+
+# In-memory results of downloadUSGS keyed by its arguments, least recently
+# used first; only the last USGS_DOWNLOAD_CACHE_SIZE are kept. See
+# clearUSGSDownloadCache().
+USGS_DOWNLOAD_CACHE_SIZE = 32
+_DOWNLOAD_CACHE = OrderedDict()
+_DOWNLOAD_CACHE_LOCK = threading.Lock()
+
+# Short names accepted by findUSGSCode and the NWIS parameter codes they map to.
+USGS_PARAMETER_CODES = {
+    'Q': '00060',
+    'Stage': '00065',
+    'Umean': '72294',
+    'Turbidity': '63680',
+    'Tempmean': '00010',
+}
+
 USGS_SEDIMENT_PARAMETER_FALLBACKS = {
     '69273': ('Suspended sediment, fall diameter (deionized water), percent smaller than 0.001 millimeters', '%', 'fraction'),
     '70331': ('Suspended sediment, sieve diameter, percent smaller than 0.0625 millimeters', '%', 'fraction'),
@@ -53,10 +113,6 @@ USGS_SEDIMENT_PARAMETER_FALLBACKS = {
     '80154': ('Suspended sediment concentration, milligrams per liter', 'mg/l', 'kg/m3'),
 }
 
-def addSlash(text):
-    return text+'/'
-
-
 def buildObservedWQParameterSummary(df):
     '''
     Build a simple summary table for the parameter codes actually observed in a
@@ -103,11 +159,110 @@ def writeObservedWQParameterSummary(df, siteNo, dtype, characteristic_name=None,
             +str(row['ParameterExplanation'])+'\n'
         )
     with open(outputHead,'wb') as f:
-        for line in lines:
-            f.write(line.encode('utf-8'))
+        f.writelines(line.encode('utf-8') for line in lines)
     return outputHead
 
-def genUSGSUrl(siteNo,dtype,startDT,endDT):
+def _readBody(resp):
+    '''
+    Stream a response body into a BytesIO in 64 KB chunks and rewind it.
+    '''
+    buf=io.BytesIO()
+    for chunk in resp.iter_content(chunk_size=65536):
+        buf.write(chunk)
+    buf.seek(0)
+    return buf
+
+def _fetchUrl(Url):
+    '''
+    Download Url through the shared session and return the body as a BytesIO,
+    going through the local response cache when USGS_CACHE_DIR is set.
+    '''
+    if USGS_CACHE_DIR is None:
+        with _SESSION.get(Url,stream=True,timeout=30) as resp:
+            resp.raise_for_status()
+            return _readBody(resp)
+
+    key=hashlib.sha1(Url.encode('utf-8')).hexdigest()
+    bodyFile=os.path.join(USGS_CACHE_DIR,key+'.body')
+    metaFile=os.path.join(USGS_CACHE_DIR,key+'.json')
+    meta=None
+    if os.path.exists(bodyFile) and os.path.exists(metaFile):
+        with open(metaFile) as f:
+            meta=json.load(f)
+        if time.time()-os.path.getmtime(bodyFile) < USGS_CACHE_EXPIRE:
+            with open(bodyFile,'rb') as f:
+                return io.BytesIO(f.read())
+
+    headers={}
+    if meta is not None:
+        if meta.get('etag'):
+            headers['If-None-Match']=meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since']=meta['last_modified']
+    with _SESSION.get(Url,stream=True,timeout=30,headers=headers) as resp:
+        if meta is not None and resp.status_code==304:
+            os.utime(bodyFile)
+            os.utime(metaFile)
+            with open(bodyFile,'rb') as f:
+                return io.BytesIO(f.read())
+        resp.raise_for_status()
+        buf=_readBody(resp)
+        newMeta={'url':Url,
+                 'etag':resp.headers.get('ETag'),
+                 'last_modified':resp.headers.get('Last-Modified')}
+
+    # The cache is best effort: a read-only or full disk must not break downloads.
+    try:
+        os.makedirs(USGS_CACHE_DIR,exist_ok=True)
+        for fname,data in ((bodyFile,buf.getbuffer()),
+                           (metaFile,json.dumps(newMeta).encode('utf-8'))):
+            fd,tmp=tempfile.mkstemp(prefix=_CACHE_TMP_PREFIX,dir=USGS_CACHE_DIR)
+            with os.fdopen(fd,'wb') as f:
+                f.write(data)
+            os.replace(tmp,fname)
+    except OSError:
+        pass
+    return buf
+
+def pruneUSGSCache(maxAge=None):
+    '''
+    Delete disk cache entries last fetched or revalidated more than maxAge
+    seconds ago (default USGS_CACHE_MAX_AGE); maxAge=0 empties the cache.
+    Only files written by the cache are touched, and a .body/.json pair is
+    always removed together. Returns the number of files removed.
+    '''
+    if USGS_CACHE_DIR is None or not os.path.isdir(USGS_CACHE_DIR):
+        return 0
+    if maxAge is None:
+        maxAge=USGS_CACHE_MAX_AGE
+    cutoff=time.time()-maxAge
+    groups={}
+    for entry in os.scandir(USGS_CACHE_DIR):
+        if not entry.is_file():
+            continue
+        match=_CACHE_ENTRY.match(entry.name)
+        if match is not None:
+            groups.setdefault(match.group(1),[]).append(entry)
+        elif entry.name.startswith(_CACHE_TMP_PREFIX):
+            groups[entry.name]=[entry]
+    removed=0
+    for entries in groups.values():
+        try:
+            # A pair ages by its body, which is what _fetchUrl checks and touches.
+            stamp=[e for e in entries if e.name.endswith('.body')] or entries
+            if min(e.stat().st_mtime for e in stamp) > cutoff:
+                continue
+        except OSError:
+            continue
+        for e in entries:
+            try:
+                os.remove(e.path)
+                removed+=1
+            except OSError:
+                pass
+    return removed
+
+def genUSGSUrl(siteNo,dtype,startDT,endDT,outformat='rdb'):
     '''
     #dtype = iv(instantaneous values), dv(daily averaged value), mv(monthly averaged value), yv
     ##
@@ -125,41 +280,285 @@ def genUSGSUrl(siteNo,dtype,startDT,endDT):
     #siteStatus=[ all | active | inactive ]
     ##
     '''
-    outformat='rdb'
-    siteStatus='all'
-
     #    https://waterservices.usgs.gov/nwis/iv/?sites=07381590&startDT=2024-10-08T21:40:46.407-05:00&endDT=2024-10-15T21:40:46.407-05:00&parameterCd=00065&format=rdb
-    Url='https://waterservices.usgs.gov/nwis/'
-    Url=Url+addSlash(dtype)
-    Url=Url+'?format='+outformat+'&sites='+siteNo+'&startDT='+startDT+'&endDT='+endDT+'&siteStatus='+siteStatus
-    return Url
+    query = {
+        'format': outformat,
+        'sites': siteNo,
+        'startDT': startDT,
+        'endDT': endDT,
+        'siteStatus': 'all',
+    }
+    return f'https://waterservices.usgs.gov/nwis/{dtype}/?'+urllib.parse.urlencode(query, quote_via=urllib.parse.quote)
+
+
+def parseUSGSJson(js):
+    '''
+    # Convert a NWIS `format=json` (WaterML 1.1 as JSON) response into the
+    # header lines and a DataFrame with single-level columns. Each time series
+    # becomes a `<methodID>_<parameterCode>` value column, with the statistic
+    # code appended as in RDB (e.g. `..._00060_00003`) when the series has one,
+    # plus a matching `_cd` qualifier column, indexed by a UTC DatetimeIndex.
+    '''
+    datahead=[]
+    columns={}
+    agency=''
+    site=''
+    for ts in js['value']['timeSeries']:
+        siteCode=ts['sourceInfo']['siteCode'][0]
+        agency=siteCode['agencyCode']
+        site=siteCode['value']
+        variable=ts['variable']
+        paramCode=variable['variableCode'][0]['value']
+        suffix=paramCode
+        for option in variable.get('options',{}).get('option',[]):
+            if option.get('name')=='Statistic' and option.get('optionCode'):
+                suffix=paramCode+'_'+option['optionCode']
+        datahead.append(('# '+agency+' '+site+' '+ts['sourceInfo']['siteName']+' | '+paramCode+' | '
+                         +variable['variableDescription']+'\n').encode('utf-8'))
+        for block in ts['values']:
+            if len(block['value'])==0:
+                continue
+            name=str(block['method'][0]['methodID'])+'_'+suffix
+            if name in columns:
+                raise ValueError('Duplicate time series column '+name+' in the NWIS JSON response')
+            index=pd.to_datetime([item['dateTime'] for item in block['value']],utc=True,format='ISO8601')
+            values=np.array([item['value'] for item in block['value']],dtype=float)
+            values[values==variable['noDataValue']]=np.nan
+            columns[name]=pd.Series(values,index=index)
+            columns[name+'_cd']=pd.Series([':'.join(item['qualifiers']) for item in block['value']],index=index)
+    if len(columns)==0:
+        df=pd.DataFrame(index=pd.DatetimeIndex([],tz='UTC'))
+    else:
+        df=pd.concat(columns,axis=1)
+    df.insert(0,'site_no',site)
+    df.insert(0,'agency_cd',agency)
+    df.index.name='datetime'
+    return datahead,df
+
+
+def _writeHeader(outputHead,datahead):
+    '''
+    Save the downloaded header lines (bytes) to outputHead.
+    '''
+    with open(outputHead,'wb') as f:
+        f.writelines(datahead)
+
+
+def _readRDBHeader(buf,printHeader=False):
+    '''
+    Collect the leading '#' comment lines of an RDB buffer and leave the
+    buffer positioned at the first table line.
+    '''
+    # RDB puts every comment line before the table, so stop scanning at the
+    # first data line instead of walking the whole response.
+    datahead=[]
+    while True:
+        pos=buf.tell()
+        line=buf.readline()
+        if line[:1]!=b'#': # RDB comments only ever start a line
+            buf.seek(pos)
+            break
+        if printHeader:
+            print(line)
+        datahead.append(line)
+    return datahead
+
+
+def _rdbDtypes(names,units,compact=False):
+    '''
+    Build a read_csv dtype map from the RDB units row so pandas can skip type
+    inference: qualifier (_cd) columns become categories and the other text
+    ('s' and 'd') columns stay strings. Numeric ('n') columns are left to
+    inference because NWIS writes flags such as 'Ice' or 'Eqp' into them.
+    With compact=True every text column except datetime is a category.
+    '''
+    dtypes={}
+    for name,unit in zip(names,units):
+        if unit.endswith('n'):
+            continue
+        if name=='datetime':
+            dtypes[name]=str
+        elif compact or (name.endswith('_cd') and name!='agency_cd'):
+            dtypes[name]='category'
+        else:
+            dtypes[name]=str
+    return dtypes
+
+
+def _readRDBTable(buf,names,units,compact=False,usecols=None):
+    '''
+    Read the data rows of an RDB buffer (positioned after the units row) into
+    a DataFrame with single-level `names` columns, using pyarrow when available.
+    compact=True reads text columns as categories and downcasts numeric
+    columns to float32 (flags such as 'Ice' become NaN). usecols limits the
+    parse to the listed column names.
+    '''
+    dtypes=_rdbDtypes(names,units,compact)
+    if usecols is not None:
+        dtypes={name:value for name,value in dtypes.items() if name in usecols}
+    # pyarrow rejects an empty body (no rows in the requested period).
+    if pacsv is None or buf.tell()==len(buf.getbuffer()):
+        # low_memory=False infers each 'n' column over the whole body, so a flag
+        # such as 'Ice' late in the file cannot leave a mixed int/str column.
+        df=pd.read_csv(buf,sep='\t',header=None,names=names,usecols=usecols,dtype=dtypes,engine='c',low_memory=False)
+    else:
+        # pd.read_csv(engine='pyarrow') infers types before applying dtype=, which
+        # strips leading zeros from site_no, so declare the text columns to pyarrow.
+        table=pacsv.read_csv(buf,
+                             read_options=pacsv.ReadOptions(column_names=names),
+                             parse_options=pacsv.ParseOptions(delimiter='\t'),
+                             convert_options=pacsv.ConvertOptions(column_types={name:pa.string() for name in dtypes},
+                                                                  include_columns=usecols,
+                                                                  strings_can_be_null=True))
+        df=table.to_pandas().astype(dtypes)
+    if compact:
+        for name,unit in zip(names,units):
+            if unit.endswith('n') and name in df.columns:
+                df[name]=pd.to_numeric(df[name],errors='coerce').astype(np.float32)
+    return df
 
 
-def downloadUSGS(siteNo,dtype,startDT,endDT,saveheaderparth=None,printHeader=True):
-    Url=genUSGSUrl(siteNo,dtype,startDT,endDT)
+def downloadUSGS(siteNo,dtype,startDT,endDT,saveheaderparth=None,printHeader=True,outformat='rdb'):
+    '''
+    # outformat='rdb' (default) returns the RDB table; the RDB units row is dropped.
+    # outformat='json' parses the NWIS JSON response instead, which carries
+    # typed values and ISO-8601 timestamps (see parseUSGSJson). Other formats
+    # (e.g. 'waterml') are not parsed and raise ValueError.
+    ##
+    # The last USGS_DOWNLOAD_CACHE_SIZE results are memoized per argument set,
+    # so rerunning a notebook cell returns a copy without downloading or
+    # parsing again; the header is still printed and its file rewritten. Use
+    # clearUSGSDownloadCache() to force a fresh download.
+    '''
+    if not (isinstance(outformat,str) and outformat.startswith(('rdb','json'))):
+        raise ValueError('Unsupported outformat '+repr(outformat)+'; use "rdb" or "json"')
+    key=(siteNo,dtype,startDT,endDT,saveheaderparth,outformat)
+    with _DOWNLOAD_CACHE_LOCK:
+        cached=_DOWNLOAD_CACHE.get(key)
+        if cached is not None:
+            _DOWNLOAD_CACHE.move_to_end(key)
+    if cached is not None:
+        datahead,df=cached
+        if printHeader:
+            print('Using cached download of ',genUSGSUrl(siteNo,dtype,startDT,endDT,outformat=outformat))
+            for line in datahead:
+                print(line)
+        _writeHeader(_headerPath(siteNo,dtype,saveheaderparth),datahead)
+    else:
+        datahead,df=_downloadUSGS(siteNo,dtype,startDT,endDT,saveheaderparth,printHeader,outformat)
+        with _DOWNLOAD_CACHE_LOCK:
+            _DOWNLOAD_CACHE[key]=(datahead,df)
+            _DOWNLOAD_CACHE.move_to_end(key)
+            while len(_DOWNLOAD_CACHE) > max(USGS_DOWNLOAD_CACHE_SIZE,0):
+                _DOWNLOAD_CACHE.popitem(last=False)
+    return list(datahead),df.copy()
+
+
+def clearUSGSDownloadCache():
+    '''
+    Drop all results memoized by downloadUSGS and empty the disk cache for
+    every site (see pruneUSGSCache), so the next call downloads from NWIS again.
+    '''
+    with _DOWNLOAD_CACHE_LOCK:
+        _DOWNLOAD_CACHE.clear()
+    pruneUSGSCache(0)
+
+
+def _headerPath(siteNo,dtype,saveheaderparth):
+    if saveheaderparth != None:
+        return os.path.join(saveheaderparth,'USGS'+siteNo+'_'+dtype+'_head.txt')
+    return 'USGS'+siteNo+'_'+dtype+'_head.txt'
+
+
+def _downloadUSGS(siteNo,dtype,startDT,endDT,saveheaderparth,printHeader,outformat):
+    Url=genUSGSUrl(siteNo,dtype,startDT,endDT,outformat=outformat)
     if printHeader:
         print('Downloading ',Url)
     
-    datahead=[]
-    if saveheaderparth != None:
-        outputHead=os.path.join(saveheaderparth,'USGS'+siteNo+'_'+dtype+'_head.txt')
-    else:
-        outputHead='USGS'+siteNo+'_'+dtype+'_head.txt'
-    data = urllib.request.urlopen(Url) # it's a file like object and works just like a file
-    for line in data: # files are iterable
-        if b'#' in line:
-            if printHeader:
+    outputHead=_headerPath(siteNo,dtype,saveheaderparth)
+    # Fetch the response once and parse both the header and the table from
+    # the same in-memory copy instead of downloading the URL a second time.
+    buf=_fetchUrl(Url)
+    if outformat.startswith('json'):
+        datahead,df=parseUSGSJson(json.loads(buf.getvalue()))
+        if printHeader:
+            for line in datahead:
                 print(line)
-            datahead.append(line)
-    with open(outputHead,'wb') as f:
-        for line in datahead:
-            f.write(line)
-    df=pd.read_csv(Url,sep='\t',comment='#',header=[0,1],low_memory=False)
-    df['datetime']=pd.to_datetime(df['datetime']['20d'])
-    df=df.set_index(df['datetime']['20d'])
+        _writeHeader(outputHead,datahead)
+        return datahead,df
+    datahead=_readRDBHeader(buf,printHeader)
+    # The header file does not depend on the table, so write it in the
+    # background while the table is parsed; result() re-raises write errors.
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        headerWrite=ex.submit(_writeHeader,outputHead,datahead)
+        names=buf.readline().rstrip(b'\r\n').decode('utf-8').split('\t')
+        units=buf.readline().rstrip(b'\r\n').decode('utf-8').split('\t')
+        df=_readRDBTable(buf,names,units)
+        # RDB datetimes are local ISO strings (tz is in tz_cd); an explicit
+        # format keeps pandas on the fast parser and cache dedups repeated stamps.
+        df.index=pd.DatetimeIndex(pd.to_datetime(df.pop('datetime'),format='ISO8601',cache=True),name='datetime')
+    headerWrite.result()
     return datahead,df
 
 
+def _pickValueColumn(names,paramCode):
+    '''
+    Return the value column (not a _cd qualifier) whose name contains
+    paramCode, preferring the daily mean ('00003') when several statistics
+    match; None if there is no match.
+    '''
+    result=[name for name in names if paramCode in name and not name.endswith('_cd')]
+    if len(result)>1:
+        result=[name for name in result if '00003' in name] or result
+    return result[0] if result else None
+
+
+def downloadUSGS_arrays(siteNo,dtype,startDT,endDT,paramCode='00060'):
+    '''
+    # Lightweight alternative to downloadUSGS for a single parameter.
+    # Returns (timestamps, values, qual_codes) as numpy arrays:
+    #   timestamps: datetime64[m] local times (as in the RDB datetime column)
+    #   values:     float32, NaN where the value is missing or non-numeric (e.g. Ice)
+    #   qual_codes: unicode qualifier codes such as 'A' or 'P:e'
+    # paramCode is matched against the RDB column names, e.g. '00060' or '00065',
+    # with the same '00003' tie-break as findUSGSCode.
+    # Only those three columns are parsed and no header file is written.
+    '''
+    buf=_fetchUrl(genUSGSUrl(siteNo,dtype,startDT,endDT))
+    _readRDBHeader(buf)
+    names=buf.readline().rstrip(b'\r\n').decode('utf-8').split('\t')
+    units=buf.readline().rstrip(b'\r\n').decode('utf-8').split('\t')
+    valueCol=_pickValueColumn(names,paramCode)
+    if valueCol is None:
+        raise ValueError('Parameter code '+paramCode+' not in the dataset for USGS site number '+siteNo)
+    if buf.tell()==len(buf.getbuffer()): # no rows in the requested period
+        return np.array([],dtype='datetime64[m]'),np.array([],dtype=np.float32),np.array([],dtype=str)
+    df=_readRDBTable(buf,names,units,compact=True,usecols=['datetime',valueCol,valueCol+'_cd'])
+    timestamps=pd.to_datetime(df['datetime'],format='ISO8601',cache=True).to_numpy().astype('datetime64[m]')
+    # Qualifiers are categorical: look the codes up in the categories, with
+    # the appended '' standing in for missing codes (-1).
+    quals=df[valueCol+'_cd'].cat
+    qualCodes=np.append(np.asarray(quals.categories,dtype=str),'')[quals.codes.to_numpy()]
+    return timestamps,df[valueCol].to_numpy(),qualCodes
+
+
+def downloadUSGS_many(sites,dtype,startDT,endDT,saveheaderparth=None,max_workers=8):
+    '''
+    # Download several streamgages concurrently with a thread pool.
+    # Returns a list of (datahead, df) tuples in the same order as `sites`.
+    ##
+    # Please be polite to the USGS servers: keep max_workers modest (the
+    # shared session pools at most 16 connections) and avoid re-requesting
+    # the same sites in a tight loop. NWIS may block clients that flood it.
+    ##
+    '''
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        results=list(ex.map(lambda siteNo: downloadUSGS(siteNo,dtype,startDT,endDT,
+                                                         saveheaderparth=saveheaderparth,printHeader=False),
+                             sites))
+    return results
+
+
 def genUSGS_WQData_Url(siteNo,dtype,paramgroup=None,characteristic_name=None):
     '''
     # Water-quality retrieval now uses the current Water Quality Portal CSV API.
@@ -195,17 +594,18 @@ def downloadUSGSWQ(siteNo,dtype,paramgroup=None,saveheaderparth=None,printHeader
         outputHead=os.path.join(saveheaderparth,'USGS'+siteNo+'_'+dtype+'_head.txt')
     else:
         outputHead=os.path.join('USGS'+siteNo+'_'+dtype+'_head.txt')
-    df=pd.read_csv(Url,low_memory=False)
+    df=pd.read_csv(_fetchUrl(Url),low_memory=False)
     if 'ActivityStartTime/Time' in df.columns:
         df['ActivityStartTime/Time'] = df['ActivityStartTime/Time'].fillna('12:00:00')
     else:
         df['ActivityStartTime/Time'] = '12:00:00'
-    df['datetime']=pd.to_datetime(
-        df['ActivityStartDate'].astype(str)+' '+df['ActivityStartTime/Time'].astype(str),
-        errors='coerce'
-    )
+    # WQP dates and times have fixed layouts, so build one ISO string and
+    # parse it with an explicit format instead of pandas' format inference.
+    df.index=pd.DatetimeIndex(pd.to_datetime(
+        df['ActivityStartDate'].astype(str)+'T'+df['ActivityStartTime/Time'].astype(str),
+        format='%Y-%m-%dT%H:%M:%S',cache=True,errors='coerce'
+    ),name='datetime')
     writeObservedWQParameterSummary(df, siteNo, dtype, characteristic_name=characteristic_name, saveheaderparth=saveheaderparth)
-    df=df.set_index(['datetime'])
     return datahead,df
 
 
@@ -222,65 +622,54 @@ def convertCommonUnitsToSI(df):
     - tons/day -> kg/s using short tons
     '''
     out=df.copy()
-    if isinstance(out.columns, pd.MultiIndex):
-        for col in out.columns:
-            col0 = str(col[0])
+    if 'ResultMeasureValue' in out.columns and 'ResultMeasure/MeasureUnitCode' in out.columns:
+        out['ResultMeasureValue_SI'] = pd.to_numeric(out['ResultMeasureValue'], errors='coerce').astype(float)
+        out['ResultMeasureUnit_SI'] = out['ResultMeasure/MeasureUnitCode']
+        mg_mask = out['ResultMeasure/MeasureUnitCode'].astype(str).str.lower() == 'mg/l'
+        out.loc[mg_mask, 'ResultMeasureValue_SI'] = out.loc[mg_mask, 'ResultMeasureValue_SI']*0.001
+        out.loc[mg_mask, 'ResultMeasureUnit_SI'] = 'kg/m3'
+        pct_mask = out['ResultMeasure/MeasureUnitCode'].astype(str) == '%'
+        out.loc[pct_mask, 'ResultMeasureValue_SI'] = out.loc[pct_mask, 'ResultMeasureValue_SI']/100.0
+        out.loc[pct_mask, 'ResultMeasureUnit_SI'] = 'fraction'
+        ton_mask = out['ResultMeasure/MeasureUnitCode'].astype(str).str.lower() == 'tons/day'
+        out.loc[ton_mask, 'ResultMeasureValue_SI'] = out.loc[ton_mask, 'ResultMeasureValue_SI']*907.18474/86400.0
+        out.loc[ton_mask, 'ResultMeasureUnit_SI'] = 'kg/s'
+    else:
+        # Streamgage columns gain a `<column>_SI` companion in m3/s, m or m/s.
+        for col in list(out.columns):
+            col0 = str(col)
             if '00060' in col0 and not col0.endswith('_cd'):
-                out[(col0+'_SI','m3/s')] = pd.to_numeric(out[col], errors='coerce')*0.028316846592
+                out[col0+'_SI'] = pd.to_numeric(out[col], errors='coerce')*0.028316846592
             if '00065' in col0 and not col0.endswith('_cd'):
-                out[(col0+'_SI','m')] = pd.to_numeric(out[col], errors='coerce')*0.3048
+                out[col0+'_SI'] = pd.to_numeric(out[col], errors='coerce')*0.3048
             if '72294' in col0 and not col0.endswith('_cd'):
-                out[(col0+'_SI','m/s')] = pd.to_numeric(out[col], errors='coerce')*0.3048
-    else:
-        if 'ResultMeasureValue' in out.columns and 'ResultMeasure/MeasureUnitCode' in out.columns:
-            out['ResultMeasureValue_SI'] = pd.to_numeric(out['ResultMeasureValue'], errors='coerce').astype(float)
-            out['ResultMeasureUnit_SI'] = out['ResultMeasure/MeasureUnitCode']
-            mg_mask = out['ResultMeasure/MeasureUnitCode'].astype(str).str.lower() == 'mg/l'
-            out.loc[mg_mask, 'ResultMeasureValue_SI'] = out.loc[mg_mask, 'ResultMeasureValue_SI']*0.001
-            out.loc[mg_mask, 'ResultMeasureUnit_SI'] = 'kg/m3'
-            pct_mask = out['ResultMeasure/MeasureUnitCode'].astype(str) == '%'
-            out.loc[pct_mask, 'ResultMeasureValue_SI'] = out.loc[pct_mask, 'ResultMeasureValue_SI']/100.0
-            out.loc[pct_mask, 'ResultMeasureUnit_SI'] = 'fraction'
-            ton_mask = out['ResultMeasure/MeasureUnitCode'].astype(str).str.lower() == 'tons/day'
-            out.loc[ton_mask, 'ResultMeasureValue_SI'] = out.loc[ton_mask, 'ResultMeasureValue_SI']*907.18474/86400.0
-            out.loc[ton_mask, 'ResultMeasureUnit_SI'] = 'kg/s'
+                out[col0+'_SI'] = pd.to_numeric(out[col], errors='coerce')*0.3048
     return out
 
 
 def findUSGSCode(Df, paramType):
     '''
     # This function can automatically find the parameter number in the USGS data 
+    # paramType is a key of USGS_PARAMETER_CODES or a 5-digit NWIS parameter code
     '''
-    if paramType=='Q':
-        paramCode='00060'
-    elif paramType=='Stage':
-        paramCode='00065'
-    elif paramType=='Umean':
-        paramCode='72294'
-    elif paramType=='Turbidity':
-        paramCode='63680'
-    elif paramType=='Tempmean':
-        paramCode='00010'
-    else:
-        print('Error in findUSGSCode!!! Parameter code not found!')
-        print('Please choose from: "Q", "Stage", "Umean", "Turbidity", "Tempmean", or edit this function to self define a parameter.')
-        return
+    paramCode = USGS_PARAMETER_CODES.get(paramType) if isinstance(paramType, str) else None
+    if paramCode is None:
+        if not (isinstance(paramType, str) and len(paramType)==5 and paramType.isdigit()):
+            print('Error in findUSGSCode!!! Parameter code not found!')
+            print('Please choose from: "'+'", "'.join(USGS_PARAMETER_CODES)+'", pass a 5-digit USGS parameter code, or add an entry to USGS_PARAMETER_CODES.')
+            return
+        paramCode = paramType
     
-    paramCodes = [item[0] for item in Df.columns]
-    result = [item for item in paramCodes if paramCode in item and not item.endswith("_cd")]
-    if len(result)==0:
-        print('Error in findUSGSCode!!! Parameter code not in the dataset!!!','USGS site number:',Df['site_no']['15s'].iloc[0])
+    result = _pickValueColumn(Df.columns.astype(str), paramCode)
+    if result is None:
+        print('Error in findUSGSCode!!! Parameter code not in the dataset!!!','USGS site number:',Df['site_no'].iloc[0])
         return
-    if len(result)>1:
-        result = [item for item in paramCodes if '00003' in item and not item.endswith("_cd")]
     
-    return result[0]
+    return result
 
 def readDownloadedData(fname):
-    df=pd.read_csv(fname,comment='#',header=[0,1],skiprows=[2],low_memory=False)
-    if 'datetime' in df.columns:
-        df=df.drop(['datetime'], axis=1,level=0)
-    df['datetime']=pd.to_datetime(df['Unnamed: 0_level_0']['Unnamed: 0_level_1'])
+    df=pd.read_csv(fname,comment='#',dtype={'site_no':str},low_memory=False)
+    df['datetime']=pd.to_datetime(df['datetime'],format='ISO8601')
     return df
 
 
@@ -298,7 +687,7 @@ if __name__ == "__main__":
 
     PlotParameterType='Q'
     plt.figure(figsize=(12,3))
-    plt.plot(df[findUSGSCode(df, PlotParameterType)]['14n'])
+    plt.plot(df[findUSGSCode(df, PlotParameterType)])
     plt.grid()
     plt.ylabel(PlotParameterType)
     plt.show()